@@ -10,41 +10,28 @@
 ##################################################
 
 
-import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
 from collections import Counter
-import pickle
+from functools import lru_cache
 import copy
 
+# Row labels, column labels and size for every supported grid length
+_GRID_SHAPES = {
+    81: ('ABCDEFGHI', '123456789', 9),
+    16: ('ABCD', '1234', 4),
+    36: ('ABCDEF', '123456', 6),
+    144: ('ABCDEFGHIJKL',
+          ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12'], 12),
+    256: ('ABCDEFGHIJKLMNOP',
+          ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12', '13', '14', '15', '16'], 16),
+}
+
 def get_rows_cols(values):
     """
     Obtain the row and column labels based based on an input value.
     Input: a string of 81 values
     Output: row (string), columns (string), and size (int) variables
     """
-    if len(values) == 81:
-        rows = 'ABCDEFGHI'
-        cols = '123456789'
-        size = 9
-    elif len(values) == 16:
-        rows = 'ABCD'
-        cols = '1234'
-        size = 4
-    elif len(values) == 36:
-        rows = 'ABCDEF'
-        cols = '123456'
-        size = 6
-    elif len(values) == 144:
-        rows = 'ABCDEFGHIJKL'
-        cols = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12']
-        size = 12
-    elif len(values) == 256:
-        rows = 'ABCDEFGHIJKLMNOP'
-        cols = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12', '13', '14', '15', '16']
-        size = 16
-    return rows, cols, size
+    return _GRID_SHAPES[len(values)]
 
 def get_boxes(rows, cols):
     """
@@ -89,14 +76,44 @@ def get_square_units(rows, cols, size):
 #                 cs in ('123', '456', '789')]
 
 def get_unit_list(values):
-    rows, cols, size = get_rows_cols(values)
+    return _get_unit_list(len(values))
+
+@lru_cache(maxsize=None)
+def _get_unit_list(length):
+    """
+    Build the row, column and square units once per grid size.
+    The strategies call get_unit_list on every pass, so the result is cached
+    and shared between calls; callers must not modify it.
+    Input: number of boxes in the grid (int)
+    Output: a list of units, each unit being a list of box labels
+    """
+    rows, cols, size = _GRID_SHAPES[length]
     return get_row_units(rows, cols) + get_column_units(rows, cols) + get_square_units(rows, cols, size)
 
 def get_units(unit_list, boxes):
-    return dict((s, [u for u in unit_list if s in u]) for s in boxes)
+    # One pass over the units instead of scanning every unit for every box.
+    # The 12 and 16 column units can repeat labels or hold non-box ones.
+    units = dict((s, []) for s in boxes)
+    for unit in unit_list:
+        for s in set(unit):
+            if s in units:
+                units[s].append(unit)
+    return units
 
 def get_peers(units, boxes):
-    return dict((s, set(sum(units[s], []))-set([s])) for s in boxes)
+    return dict((s, set(box for unit in units[s] for box in unit)-set([s])) for s in boxes)
+
+@lru_cache(maxsize=None)
+def _get_peers(length):
+    """
+    Build the peers of every box once per grid size.
+    Cached and shared between calls like _get_unit_list; callers must not modify it.
+    Input: number of boxes in the grid (int)
+    Output: a dictionary of the form {'box_name': set of peer box names, ...}
+    """
+    rows, cols, size = _GRID_SHAPES[length]
+    boxes = get_boxes(rows, cols)
+    return get_peers(get_units(_get_unit_list(length), boxes), boxes)
 
 def single_position(values):
     """
@@ -106,10 +123,7 @@ def single_position(values):
     Output: The resulting sudoku in dictionary form.
     """
     # print('---Single Position---)
-    rows, cols, size = get_rows_cols(values)
-    boxes = get_boxes(rows, cols)
-    unit_list = get_unit_list(values)
-    peers = get_peers(get_units(unit_list, boxes), boxes)
+    peers = _get_peers(len(values))
     solved_values = [box for box in values.keys() if len(values[box]) == 1]
     for box in solved_values:
         digit = values[box]
@@ -135,30 +149,46 @@ def single_candidate(values):
     return values
 
 
-def naked_twins(values):
+def naked_subset(values, n):
     """
-    Eliminate values using the naked twins strategy.
-    Check if there are two pairs with the sames digits in a row, column or square
+    Eliminate values using the naked subset strategy shared by naked_twins,
+    naked_triple and naked_quadruple.
+    Check if there are n boxes with the same n digits in a row, column or square
 
     Args:
         values(dict): a dictionary of the form {'box_name': '123456789', ...}
+        n(int): the size of the subset (2 for twins, 3 for triples, 4 for quads)
+
     Returns:
-        the values dictionary with the naked twins eliminated from peers.
+        the values dictionary with the subset digits eliminated from peers.
     """
-    # print('---Naked Twins---)
     unit_list = get_unit_list(values)
     for unit in unit_list:
-        # 1. Find twins
-        twins = [v for v in [values[box] for box in unit] if
-                 [values[box] for box in unit].count(v) == 2 and len(v) == 2]
+        # 1. Find subsets
+        counts = Counter(values[box] for box in unit)
+        subsets = [v for v, count in counts.items() if count == n and len(v) == n]
+        # print(f'subsets: {subsets}')
         for box in unit:
-            if values[box] in twins:
+            if values[box] in subsets:
                 continue
-            for twin in twins:
-                for digit in twin:
+            for subset in subsets:
+                for digit in subset:
                     values[box] = values[box].replace(digit, "")
     return values
 
+def naked_twins(values):
+    """
+    Eliminate values using the naked twins strategy.
+    Check if there are two pairs with the sames digits in a row, column or square
+
+    Args:
+        values(dict): a dictionary of the form {'box_name': '123456789', ...}
+    Returns:
+        the values dictionary with the naked twins eliminated from peers.
+    """
+    # print('---Naked Twins---)
+    return naked_subset(values, 2)
+
 def locked_twins(values):
     """
     Eliminate values using the locked twins/pair strategy.
@@ -171,19 +201,21 @@ def locked_twins(values):
         the values dictionary with the naked twins eliminated from peers.
     """
     # print('---Locked Twins---)
-    rows, cols, size = get_rows_cols(values)
-    boxes = get_boxes(rows, cols)
     unit_list = get_unit_list(values)
     twins_houses = {}
+    # Index the boxes by value once instead of scanning the grid for every twin
+    boxes_by_value = {}
+    for key, value in values.items():
+        boxes_by_value.setdefault(value, []).append(key)
     for count, unit in enumerate(unit_list):
         # 1. Find twins - this needs to be adusted to find twins in different houses
-        twins_values = [value for value in [values[box] for box in unit] if
-                 [values[box] for box in unit].count(value) == 2 and len(value) == 2]
-        twins_boxes = [([key for key, value in values.items() if value == twins_values]) for
-               twins_values in twins_values]
+        unit_values = [values[box] for box in unit]
+        counts = Counter(unit_values)
+        twins_values = [value for value in unit_values if
+                 counts[value] == 2 and len(value) == 2]
         # add the house and the twins to a dict outside the loop
         if len(twins_values) > 0:
-            twins_houses[count] = dict(zip(twins_boxes[0], twins_values))
+            twins_houses[count] = dict(zip(boxes_by_value[twins_values[0]], twins_values))
 
         #if conditional - if the twins are in shared houses do the below operation
     for key, value in twins_houses.items():
@@ -211,19 +243,7 @@ def naked_triple(values):
         the values dictionary with the naked twins eliminated from peers.
     """
     # print('---Naked Triple---)
-    unit_list = get_unit_list(values)
-    for unit in unit_list:
-        # 1. Find triples
-        triples = [v for v in [values[box] for box in unit] if
-                 [values[box] for box in unit].count(v) == 3 and len(v) == 3]
-        # print(f'triples: {triples}')
-        for box in unit:
-            if values[box] in triples:
-                continue
-            for triple in triples:
-                for digit in triple:
-                    values[box] = values[box].replace(digit, "")
-    return values
+    return naked_subset(values, 3)
 
 def locked_triple(values):
     """
@@ -239,10 +259,12 @@ def locked_triple(values):
     """
     # print('---Locked Triple---)
     unit_list = get_unit_list(values)
-    values_triples = [a for a, count in Counter([value for key, value in values.items() if
-                    len(value) == 3]).items() if count > 2]
-    triples = [([key for key, value in values.items() if value == value_triple]) for
-            value_triple in values_triples]
+    # Group the boxes by their 3-digit value in one pass over the grid
+    boxes_by_value = {}
+    for key, value in values.items():
+        if len(value) == 3:
+            boxes_by_value.setdefault(value, []).append(key)
+    triples = [boxes for boxes in boxes_by_value.values() if len(boxes) > 2]
     # print(f'locked triples: {triples}')
     for triple in triples:
         for unit in unit_list:
@@ -267,19 +289,7 @@ def naked_quadruple(values):
         the values dictionary with the naked twins eliminated from peers.
     """
     # print('---Naked Quad---')
-    unit_list = get_unit_list(values)
-    for unit in unit_list:
-        # 1. Find quads
-        quads = [v for v in [values[box] for box in unit] if
-                 [values[box] for box in unit].count(v) == 4 and len(v) == 4]
-        # print(f'quads: {quads}')
-        for box in unit:
-            if values[box] in quads:
-                continue
-            for quad in quads:
-                for digit in quad:
-                    values[box] = values[box].replace(digit, "")
-    return values
+    return naked_subset(values, 4)
 
 def simple_color_trap(values):
     """
@@ -295,15 +305,13 @@ def simple_color_trap(values):
         the values dictionary with the red colored numbers eliminated from peers.
     """
     # print('---Simple Color Trap---')
-    rows, cols, size = get_rows_cols(values)
-    boxes = get_boxes(rows, cols)
     unit_list = get_unit_list(values)
     blue, yellow, red = [], [], []
     all_blues_found, all_yellows_found = False, False
     # Search for first conjugate pair as a starting point
     for unit in unit_list:
-        conjugate_pairs = [v for v in [values[box] for box in unit] if
-                [values[box] for box in unit].count(v) == 2]
+        counts = Counter(values[box] for box in unit)
+        conjugate_pairs = [v for v, count in counts.items() if count == 2]
         # print(conjugate_pairs)
         for box in unit:
             if values[box] in conjugate_pairs:
@@ -325,8 +333,8 @@ def simple_color_trap(values):
         # Find more yellows
         # Not complete, should only take unmarked conjugate pairs that are next to blues
         for unit in unit_list:
-            conjugate_pairs = [v for v in [values[box] for box in unit] if
-                    [values[box] for box in unit].count(v) == 2]
+            counts = Counter(values[box] for box in unit)
+            conjugate_pairs = [v for v, count in counts.items() if count == 2]
             check_for_update = yellow
             for box in unit:
                 if values[box] in conjugate_pairs:
@@ -341,8 +349,8 @@ def simple_color_trap(values):
         # Find more blues
         # Not complete, should only take unmarked conjugate pairs that are next to yellows
         for unit in unit_list:
-            conjugate_pairs = [v for v in [values[box] for box in unit] if
-                    [values[box] for box in unit].count(v) == 2]
+            counts = Counter(values[box] for box in unit)
+            conjugate_pairs = [v for v, count in counts.items() if count == 2]
             check_for_update = blue
             for box in unit:
                 if values[box] in conjugate_pairs:
@@ -406,12 +414,12 @@ def reduce_puzzle(values):
     Input: A sudoku in dictionary form.
     Output: The resulting sudoku in dictionary form.
     """
-    solved_values = [box for box in values.keys() if
-                     len(values[box]) == 1]
+    solved_values_after = len([box for box in values.keys() if
+                               len(values[box]) == 1])
     stalled = False
     while not stalled:
-        solved_values_before = len([box for box in values.keys() if
-                                    len(values[box]) == 1])
+        # The previous pass already counted the solved boxes
+        solved_values_before = solved_values_after
         values = single_position(values)
         values = single_candidate(values)
         values = naked_twins(values)
@@ -424,8 +432,7 @@ def reduce_puzzle(values):
         solved_values_after = len([box for box in values.keys() if
                                    len(values[box]) == 1])
         stalled = solved_values_before == solved_values_after
-        if len([box for box in values.keys() if
-                len(values[box]) == 0]):
+        if any(len(values[box]) == 0 for box in values.keys()):
             return (False, values)
     return True, values
 
@@ -492,38 +499,33 @@ def validator(grid):
     """
     rows, cols, size = get_rows_cols(grid)
     boxes = get_boxes(rows, cols)
-    unit_list = get_unit_list(grid)
-    peers = get_peers(get_units(unit_list, boxes), boxes)
-    valuesv = dict(zip(boxes, ["." if element == "." else
-                   element for element in grid]))
+    peers = _get_peers(len(grid))
+    valuesv = dict(zip(boxes, grid))
     answ = []
-    values_grid = dict(filter(lambda n: n[1] != ".", valuesv.items()))
-    a = [(valuesv[n], [valuesv[p] for p in peers[n]], n) for
-         n in list(values_grid.keys())]
-    # print(f'len of a: {len(a)}')
-    for x in a:
-        if x[0] in x[1]:
-            answ.append([False, x[0], x[2]])
-        else:
-            pass
+    # Single pass over the filled boxes, stopping at the first clashing peer
+    for box, value in valuesv.items():
+        if value == ".":
+            continue
+        if any(valuesv[peer] == value for peer in peers[box]):
+            answ.append([False, value, box])
     # print(f'answer: {answ}')
     return answ
 
 
 def transf(values):
     """
-    Convert dictionary to a string
+    Count the candidates left in the puzzle
     Input : dictionary
-    Output: string of length 81
+    Output: total length of all the values (int)
     """
-    return len("".join([value for value in values.values()]))
+    return sum(len(value) for value in values.values())
 
 
 def tracker(values):
     """
     Check how many times the solver uses a function solve a puzzle
     Input : tracker(dictionary)
-    Output : array[single_position, single_candidate,
+    Output : list[single_position, single_candidate,
                    naked_twins, naked_triple, search]
     """
     rows, cols, size = get_rows_cols(values)
@@ -536,43 +538,42 @@ def tracker(values):
         values_before = values.values()
         values = single_position(values)
         values_after = transf(values)
-        answ = (answ if values_before == values_after else
-                np.add(answ, [1, 0, 0, 0, 0]))
+        if values_before != values_after:
+            answ[0] += 1
         values_before = values_after
         values = single_candidate(values)
         values_after = transf(values)
-        answ = (answ if values_before == values_after else
-                np.add(answ, [0, 1, 0, 0, 0]))
+        if values_before != values_after:
+            answ[1] += 1
         values_before = values_after
         # values = naked_twins(values)
         # values_after = transf(values)
-        # answ = (answ if values_before == values_after else
-        #         np.add(answ, [0, 0, 1, 0, 0]))
+        # if values_before != values_after:
+        #     answ[2] += 1
         # values_before = values_after
         values = naked_triple(values)
         values_after = transf(values)
-        answ = (answ if values_before == values_after else
-                np.add(answ, [0, 0, 0, 1, 0]))
+        if values_before != values_after:
+            answ[3] += 1
         values = locked_triple(values)
         solved_values = len([box for box in values.keys()
                              if len(values[box]) == 1])
-        if solved_values is 81:
+        if solved_values == 81:
             break
         stalled = solved_values == 81
         if initial == values_after:
             start += 1
             aa = [(len(values[s]), s) for
                   s in boxes if len(values[s]) > 1]
-            if len(aa) is 0:
-                pass
-            if len(aa) > 0:
-                answ = np.add(answ, [0, 0, 0, 0, 1])
+            # Nothing left to guess on, skip the guess bookkeeping
+            if aa:
+                answ[4] += 1
                 _, s = min(aa)
                 for value in values[s]:
                     new_sudoku = values.copy()
                     new_sudoku[s] = value
                     values = new_sudoku
-            if start is 10:
+            if start == 10:
                 break
     return(answ)
 
@@ -599,10 +600,16 @@ def train_model():
     Input : dataset
     Output : pickle file qith the model trained
     """
-    df = pd.read_csv(
-                     '../Omega2020/data/dataset.csv').drop('Unnamed: 0',
-                                                           axis=1)
-    df = df.drop(df[df.Level == 'TEST'].index)
+    # Imported here so the solver itself does not pay for pandas/sklearn
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LogisticRegression
+    import pickle
+    # Only the puzzle and its level are used, skip parsing the other columns
+    df = pd.read_csv('../Omega2020/data/dataset.csv',
+                     usecols=['Sudoku', 'Level'],
+                     dtype={'Sudoku': str, 'Level': str})
+    df = df[df.Level != 'TEST']
     df['Tracker'] = df['Sudoku'].apply(lambda x: tracker(conv_values(x)))
     df[['Single', 'Candidate', 'Twins',
         'Triples', 'Guess']] = pd.DataFrame(df['Tracker'].values.tolist(),